@@ -34,7 +34,7 @@ gpio_heat = 23  # Switches zero-cross solid-state-relay
 
 ### Thermocouple Adapter selection:
 #   max31855 - bitbang SPI interface
-#   max6675 - bitbang SPI interface for obsolete chip with 1023C limit
+#   max6675 - bitbang or hardware SPI interface for obsolete chip with 1023C limit
 #   max31856 - bitbang SPI interface. must specify thermocouple_type.
 max31855 = 0
 max31856 = 0
@@ -49,6 +49,15 @@ gpio_sensor_clock = 19
 gpio_sensor_data = 6
 gpio_sensor_power = 26 # optional pgio power for thermocouple chip currently implemented for max6675 only
 gpio_sensor_di = 10 # only used with max31856
+gpio_sensor_sysfs = False # max6675 only. bitbang through /sys/class/gpio instead of RPi.GPIO
+
+### Thermocouple Connection (using hardware SPI, max6675 only)
+#   set to the spi bus number (eg 0 for /dev/spidev0.0) to read the max6675
+#   through the kernel spidev driver. gpio_sensor_cs/clock/data are then ignored.
+#   see docs/max6675_spi.md for wiring, or the spi-gpio overlay to keep your pins.
+#   this is preferred, bitbanging the max6675 is deprecated.
+spi_sensor_bus = None
+spi_sensor_device = 0
 
 ########################################################################
 #
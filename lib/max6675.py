@@ -1,6 +1,160 @@
 #!/usr/bin/python
 import RPi.GPIO as GPIO
 import math
+import os
+import time
+import warnings
+from array import array
+from functools import partial
+
+from max6675_units import UNIT_CONVERSION
+
+
+# fault bits packed into MAX6675._err_bits
+NO_CONNECTION = 1
+SHORT_TO_GROUND = 2
+SHORT_TO_VCC = 4
+UNKNOWN_ERROR = 8
+
+SYSFS_GPIO = "/sys/class/gpio"
+
+def _sysfs_gpio_base():
+    '''Returns the sysfs number of BCM gpio 0. Kernels from 6.6 on number the
+    pi's gpiochip from 512, so this is read from the chip's base file.'''
+    try:
+        for chip in sorted(os.listdir(SYSFS_GPIO)):
+            if not chip.startswith("gpiochip"):
+                continue
+            with open("%s/%s/label" % (SYSFS_GPIO, chip)) as f:
+                label = f.read().strip()
+            if label.startswith(("pinctrl-bcm", "pinctrl-rp1")):
+                with open("%s/%s/base" % (SYSFS_GPIO, chip)) as f:
+                    return int(f.read())
+    except (IOError, OSError) as e:
+        raise MAX6675Error("sysfs gpio unavailable: %s" % e)
+    raise MAX6675Error("no raspberry pi gpiochip found in %s" % SYSFS_GPIO)
+
+class _FastPin(object):
+    '''Keeps a sysfs gpio value file open, so each access is a seek plus a
+    single byte read or write instead of an open/write/close per call.
+    Exports the gpio and sets its direction, outputs start high.'''
+    def __init__(self, gpio, output):
+        self.gpio = gpio
+        self.exported = False
+        path = "%s/gpio%d" % (SYSFS_GPIO, gpio)
+        try:
+            if not os.path.exists(path):
+                with open(SYSFS_GPIO + "/export", "w") as f:
+                    f.write(str(gpio))
+                self.exported = True
+            with open(path + "/direction", "w") as f:
+                f.write("high" if output else "in")
+            self.f = open(path + "/value", "r+b" if output else "rb", buffering=0)
+        except (IOError, OSError) as e:
+            self.unexport()
+            raise MAX6675Error("sysfs gpio%d: %s" % (gpio, e))
+
+    def low(self):
+        self.f.seek(0)
+        self.f.write(b"0")
+
+    def high(self):
+        self.f.seek(0)
+        self.f.write(b"1")
+
+    def read(self):
+        self.f.seek(0)
+        return self.f.read(1)[0] - 48
+
+    def unexport(self):
+        '''Unexports the gpio if this pin exported it.'''
+        if self.exported:
+            with open(SYSFS_GPIO + "/unexport", "w") as f:
+                f.write(str(self.gpio))
+            self.exported = False
+
+    def close(self):
+        self.f.close()
+        self.unexport()
+
+def _shift_in_16(lo, hi, inp):
+    '''Clock in one 16 bit frame, MSB first, from an already selected chip.
+    lo/hi drive the clock pin, inp samples the data pin and returns 0 or 1.
+    Unrolled.'''
+    lo(); b = inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    lo(); b = (b << 1) | inp(); hi()
+    return b
+
+def _close_fast_pins(fast_pins):
+    for fast in fast_pins:
+        fast.close()
+    del fast_pins[:]
+
+class _SoftSPI(object):
+    '''Clock and data lines of a bitbang bus. Shared by every chip on the bus,
+    each chip only drives its own chip select through output().'''
+    __slots__ = ('clock_pin', 'data_pin', 'sysfs_base', 'fast_pins', 'clock_low', 'clock_high', 'data_in')
+
+    def __init__(self, clock_pin, data_pin, board = GPIO.BCM, sysfs = False):
+        self.clock_pin = clock_pin
+        self.data_pin = data_pin
+        self.sysfs_base = None
+        self.fast_pins = []
+        if sysfs:
+            if board != GPIO.BCM:
+                raise MAX6675Error("sysfs gpio requires GPIO.BCM numbering")
+            self.sysfs_base = _sysfs_gpio_base()
+
+        GPIO.setmode(board)
+        if self.sysfs_base is None:
+            GPIO.setup(self.clock_pin, GPIO.OUT)
+            GPIO.setup(self.data_pin, GPIO.IN)
+        # else leave the pins to sysfs, _FastPin sets direction and level.
+        # rpi-lgpio would claim them through the gpiochip device and the
+        # sysfs export would fail with EBUSY
+        try:
+            self.clock_low, self.clock_high = self.output(self.clock_pin, self.fast_pins)
+            self.data_in = self.input(self.data_pin, self.fast_pins)
+        except MAX6675Error:
+            _close_fast_pins(self.fast_pins)
+            raise
+
+    def output(self, pin, fast_pins):
+        '''Returns (low, high) callables that drive an output pin. A sysfs
+        _FastPin is appended to fast_pins, which the caller closes.'''
+        if self.sysfs_base is None:
+            return partial(GPIO.output, pin, GPIO.LOW), partial(GPIO.output, pin, GPIO.HIGH)
+        fast = _FastPin(self.sysfs_base + pin, True)
+        fast_pins.append(fast)
+        return fast.low, fast.high
+
+    def input(self, pin, fast_pins):
+        '''Returns a callable that samples an input pin as 0 or 1.'''
+        if self.sysfs_base is None:
+            return partial(GPIO.input, pin)
+        fast = _FastPin(self.sysfs_base + pin, False)
+        fast_pins.append(fast)
+        return fast.read
+
+    def cleanup(self):
+        '''Selective GPIO cleanup'''
+        _close_fast_pins(self.fast_pins)
+        if self.sysfs_base is None:
+            GPIO.setup(self.clock_pin, GPIO.IN)
 
 class MAX6675(object):
     '''Python driver for [MAX6675 Cold-Junction Compensated Thermocouple-to-Digital Converter]
@@ -8,8 +162,13 @@ class MAX6675(object):
      - The [GPIO Library](https://code.google.com/p/raspberry-gpio-python/) (Already on most Raspberry Pi OS builds)
      - A [Raspberry Pi](http://www.raspberrypi.org/)
     '''
-    def __init__(self, cs_pin, clock_pin, data_pin, units = "c", power_pin = 0, board = GPIO.BCM):
-        '''Initialize Soft (Bitbang) SPI bus
+    __slots__ = ('cs_pin', 'clock_pin', 'data_pin', 'units', 'power_pin', 'data', 'board', 'spi',
+                 '_scale', '_offset', '_bus', '_owns_bus', '_fast_pins', '_select', '_deselect',
+                 '_err_bits')
+
+    def __init__(self, cs_pin = None, clock_pin = None, data_pin = None, units = "c", power_pin = 0, board = GPIO.BCM, spi_bus = None, spi_device = 0, sysfs = False, soft_spi = None):
+        '''Initialize hardware SPI if spi_bus is given, else Soft (Bitbang) SPI bus.
+        Hardware SPI is preferred, the bitbang bus is deprecated and kept for existing wiring.
         Parameters:
         - cs_pin:    Chip Select (CS) / Slave Select (SS) pin (Any GPIO)
         - clock_pin: Clock (SCLK / SCK) pin (Any GPIO)
@@ -17,15 +176,26 @@ class MAX6675(object):
         - units:     (optional) unit of measurement to return. ("c" (default) | "k" | "f")
         - power_pin (optional) allows thermocouple chip to be powered from gpio
         - board:     (optional) pin numbering method as per RPi.GPIO library (GPIO.BCM (default) | GPIO.BOARD)
+        - spi_bus:   (optional) hardware SPI bus, eg 0 for /dev/spidev0.X. cs/clock/data pins are ignored when set
+        - spi_device: (optional) hardware SPI chip select, eg 1 for /dev/spidev0.1 (default 0)
+        - sysfs:     (optional) bitbang through /sys/class/gpio value files kept open, BCM numbering only (default False)
+        - soft_spi:  (optional) _SoftSPI shared with other chips on the same clock/data lines. clock/data pins and sysfs are taken from it
         '''
         self.cs_pin = cs_pin
         self.clock_pin = clock_pin
         self.data_pin = data_pin
         self.units = units
+        if units not in UNIT_CONVERSION:
+            raise MAX6675Error("unknown units %s" % units)
+        self._scale, self._offset = UNIT_CONVERSION[units]
         self.power_pin = power_pin
         self.data = None
         self.board = board
-        self.noConnection = self.shortToGround = self.shortToVCC = self.unknownError = False
+        self.spi = None
+        self._bus = None
+        self._owns_bus = False
+        self._fast_pins = []
+        self._err_bits = 0
         
         #set board type
         GPIO.setmode(self.board)
@@ -33,60 +203,88 @@ class MAX6675(object):
         if (self.power_pin > 0):
             GPIO.setup(self.power_pin, GPIO.OUT)
             GPIO.output(self.power_pin, GPIO.HIGH)
-        # Initialize needed GPIO
-        GPIO.setup(self.cs_pin, GPIO.OUT)
-        GPIO.setup(self.clock_pin, GPIO.OUT)
-        GPIO.setup(self.data_pin, GPIO.IN)
-       
 
-        # Pull chip select high to make chip inactive
-        GPIO.output(self.cs_pin, GPIO.HIGH)
+        if spi_bus is not None:
+            # MAX6675 is read only, so only SCK, MISO and CE are used
+            import spidev
+            self.spi = spidev.SpiDev()
+            self.spi.open(spi_bus, spi_device)
+            self.spi.max_speed_hz = 4000000   # datasheet max SCK is 4.3MHz
+            self.spi.mode = 0
+            return
+
+        if soft_spi is None:
+            soft_spi = _SoftSPI(self.clock_pin, self.data_pin, board, sysfs)
+            self._owns_bus = True
+        self._bus = soft_spi
+        self.clock_pin = soft_spi.clock_pin
+        self.data_pin = soft_spi.data_pin
+
+        if soft_spi.sysfs_base is None:
+            # Initialize needed GPIO
+            GPIO.setup(self.cs_pin, GPIO.OUT)
+
+            # Pull chip select high to make chip inactive
+            GPIO.output(self.cs_pin, GPIO.HIGH)
+        # else _FastPin exports chip select as an output already high
+
+        # Bind the chip select accessors used by read()
+        try:
+            self._select, self._deselect = soft_spi.output(self.cs_pin, self._fast_pins)
+        except MAX6675Error:
+            if self._owns_bus:
+                soft_spi.cleanup()
+            raise
 
     def get(self):
         '''Reads SPI bus and returns current value of thermocouple.'''
         self.read()
         self.checkErrors()
-        return getattr(self, "to_" + self.units)(self.data_to_tc_temperature())
+        return (self.data >> 3) * self._scale + self._offset
 
     def read(self):
         '''Reads 16 bits of the SPI bus & stores as an integer in self.data.'''
-        bytesin = 0
+        if self.spi is not None:
+            # MISO only, so there is nothing to send
+            hi, lo = self.spi.readbytes(2)
+            self.data = (hi << 8) | lo
+            return
         # Select the chip
-        GPIO.output(self.cs_pin, GPIO.LOW)
-        # Read in 16 bits
-        for i in range(16):
-            GPIO.output(self.clock_pin, GPIO.LOW)
-            bytesin = bytesin << 1
-            if (GPIO.input(self.data_pin)):
-                bytesin = bytesin | 1
-            GPIO.output(self.clock_pin, GPIO.HIGH)
-        # Unselect the chip
-        GPIO.output(self.cs_pin, GPIO.HIGH)
-        # Save data
-        self.data = bytesin
+        self._select()
+        try:
+            # Read in 16 bits & save data
+            bus = self._bus
+            self.data = _shift_in_16(bus.clock_low, bus.clock_high, bus.data_in)
+        finally:
+            # Unselect the chip
+            self._deselect()
 
     def checkErrors(self, data_16 = None):
         '''Checks error bit'''
         if data_16 is None:
             data_16 = self.data
-        anyErrors = (data_16 & 0x4) != 0    # Fault bit, D3
-        if anyErrors:
-            self.noConnection = True       
-           
-        else:
-            self.noConnection = False
+        # Fault bit, D3. MAX6675 only detects an open thermocouple
+        self._err_bits = NO_CONNECTION if data_16 & 0x4 else 0
+
+    noConnection = property(lambda self: bool(self._err_bits & NO_CONNECTION))
+    shortToGround = property(lambda self: bool(self._err_bits & SHORT_TO_GROUND))
+    shortToVCC = property(lambda self: bool(self._err_bits & SHORT_TO_VCC))
+    unknownError = property(lambda self: bool(self._err_bits & UNKNOWN_ERROR))
 
     def data_to_tc_temperature(self, data_16 = None):
-        '''Takes an integer and returns a thermocouple temperature in celsius.'''
+        '''Takes an integer and returns a thermocouple temperature in celsius.
+        Deprecated, get() converts inline. Kept for external callers.'''
+        warnings.warn("MAX6675.data_to_tc_temperature is deprecated", DeprecationWarning, stacklevel=2)
         if data_16 is None:
             data_16 = self.data
-        tc_data = data_16 >> 3
-        return self.convert_tc_data(tc_data)
+        return (data_16 >> 3) * 0.25
 
     
 
     def convert_tc_data(self, tc_data):
-        '''Convert thermocouple data to a useful number (celsius).'''
+        '''Convert thermocouple data to a useful number (celsius).
+        Deprecated, get() converts inline. Kept for external callers.'''
+        warnings.warn("MAX6675.convert_tc_data is deprecated", DeprecationWarning, stacklevel=2)
         return tc_data * 0.25
 
     def to_c(self, celsius):
@@ -99,15 +297,81 @@ class MAX6675(object):
 
     def to_f(self, celsius):
         '''Convert celsius to fahrenheit.'''
-        return celsius * 9.0/5.0 + 32
+        return celsius * 1.8 + 32.0
 
     def cleanup(self):
         '''Selective GPIO cleanup'''
-        GPIO.setup(self.cs_pin, GPIO.IN)
-        GPIO.setup(self.clock_pin, GPIO.IN)
+        if self.spi is not None:
+            self.spi.close()
+            return
+        _close_fast_pins(self._fast_pins)
+        if self._bus.sysfs_base is None:
+            GPIO.setup(self.cs_pin, GPIO.IN)
+        if self._owns_bus:
+            self._bus.cleanup()
 
     
 
+class MAX6675Bank(object):
+    '''Several MAX6675s sharing clock and data lines, each with its own chip select.
+    The clock and data lines are set up once and shared, each chip only owns its chip select.
+    Frames and fault bits (NO_CONNECTION etc) are kept in contiguous arrays, indexed like cs_pins.
+
+    This is for convenience and the array layout only, it is not faster. Each chip is still
+    clocked bit by bit from python, so read_all() costs the same as calling get() on every
+    chip. Use hardware SPI (spi_bus) to take the clocking off the CPU.
+    '''
+    __slots__ = ('clock_pin', 'data_pin', 'thermocouples', 'cs_pins', 'data', 'errors', '_scale', '_offset', '_bus')
+
+    def __init__(self, cs_pins, clock_pin, data_pin, units = "c", power_pin = 0, board = GPIO.BCM, sysfs = False):
+        if not cs_pins:
+            raise MAX6675Error("MAX6675Bank needs at least one cs pin")
+        if units not in UNIT_CONVERSION:
+            raise MAX6675Error("unknown units %s" % units)
+        self.clock_pin = clock_pin
+        self.data_pin = data_pin
+        self._bus = _SoftSPI(clock_pin, data_pin, board, sysfs)
+        self.thermocouples = []
+        try:
+            for cs_pin in cs_pins:
+                self.thermocouples.append(MAX6675(cs_pin, units = units, power_pin = power_pin, board = board, soft_spi = self._bus))
+        except MAX6675Error:
+            self.cleanup()
+            raise
+        self.cs_pins = array('i', cs_pins)
+        self.data = array('H', bytes(2 * len(cs_pins)))
+        self.errors = array('B', bytes(len(cs_pins)))
+        self._scale, self._offset = UNIT_CONVERSION[units]
+
+    def read_all(self):
+        '''Reads every chip into self.data, also stored in each thermocouple's data, and returns it.'''
+        bus = self._bus
+        lo, hi, inp = bus.clock_low, bus.clock_high, bus.data_in
+        data = self.data
+        for i, thermocouple in enumerate(self.thermocouples):
+            thermocouple._select()
+            try:
+                data[i] = thermocouple.data = _shift_in_16(lo, hi, inp)
+            finally:
+                thermocouple._deselect()
+        return data
+
+    def get_all(self):
+        '''Reads every chip, updates self.errors and returns a list of thermocouple values.'''
+        data = self.read_all()
+        errors = self.errors
+        for i, thermocouple in enumerate(self.thermocouples):
+            thermocouple.checkErrors()
+            errors[i] = thermocouple._err_bits
+        scale, offset = self._scale, self._offset
+        return [(d >> 3) * scale + offset for d in data]
+
+    def cleanup(self):
+        '''Selective GPIO cleanup'''
+        for thermocouple in self.thermocouples:
+            thermocouple.cleanup()
+        self._bus.cleanup()
+
 class MAX6675Error(Exception):
      def __init__(self, value):
          self.value = value
@@ -116,28 +380,30 @@ class MAX6675Error(Exception):
 
 if __name__ == "__main__":
 
-    # Multi-chip example ( copied from max31855 lib. Has not been tested)
-    import time
+    # Multi-chip example, sampled once per conversion (~220ms)
+    import sched
     cs_pins = [4, 17, 18, 24]
     clock_pin = 23
     data_pin = 22
     units = "f"
-    thermocouples = []
-    for cs_pin in cs_pins:
-        thermocouples.append(MAX6675(cs_pin, clock_pin, data_pin, units))
-    running = True
-    while(running):
-        try:
-            for thermocouple in thermocouples:
-                rj = thermocouple.get_rj()
-                try:
-                    tc = thermocouple.get()
-                except MAX6675Error as e:
-                    tc = "Error: "+ e.value
-                    running = False
-                print("tc: {} and rj: {}".format(tc, rj))
-            time.sleep(1)
-        except KeyboardInterrupt:
-            running = False
-    for thermocouple in thermocouples:
-        thermocouple.cleanup()
+    conversion_time = 0.25
+    bank = MAX6675Bank(cs_pins, clock_pin, data_pin, units)
+
+    def sample(scheduler, due):
+        # schedule from the previous due time so sampling does not drift
+        due += conversion_time
+        scheduler.enterabs(due, 1, sample, (scheduler, due))
+        temps = bank.get_all()
+        for cs_pin, tc, error in zip(bank.cs_pins, temps, bank.errors):
+            if error:
+                tc = "Error: not connected"
+            print("cs: {} tc: {}".format(cs_pin, tc))
+
+    scheduler = sched.scheduler(time.monotonic, time.sleep)
+    now = time.monotonic()
+    scheduler.enterabs(now, 1, sample, (scheduler, now))
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    bank.cleanup()
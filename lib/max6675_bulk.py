@@ -0,0 +1,64 @@
+#!/usr/bin/python
+'''Bulk conversion of raw MAX6675 frames, eg logged MAX6675.data values or
+MAX6675Bank.data, for post-processing logs, downsampling or PID work.
+ Requires:
+ - numpy
+ - numba (optional) compiles the conversion kernel, plain numpy is used without it
+ See docs/max6675_bulk.md for install steps.
+
+Does not import RPi.GPIO, so logs can be processed off the pi.
+'''
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from max6675_units import UNIT_CONVERSION
+
+def _convert_loop(raw, scale, offset):
+    out = np.empty(raw.shape, np.float32)
+    for i in range(raw.size):
+        out[i] = ((raw[i] >> 3) & 0xFFF) * scale + offset
+    return out
+
+def _convert_numpy(raw, scale, offset):
+    return (((raw >> 3) & 0xFFF) * scale + offset).astype(np.float32)
+
+if numba is not None:
+    _convert = numba.njit(cache=True)(_convert_loop)
+else:
+    _convert = _convert_numpy
+
+def frames_to_temperatures(frames, units = "c"):
+    '''Takes a sequence of raw 16 bit frames and returns a float32 array of
+    thermocouple temperatures in units ("c" (default) | "k" | "f").'''
+    scale, offset = UNIT_CONVERSION[units]
+    return _convert(np.ascontiguousarray(frames, dtype=np.uint16), scale, offset)
+
+if __name__ == "__main__":
+
+    # Self check of every available kernel. 0x1A30 is 838 quarter degrees,
+    # 209.5C, 482.65K or 409.1F. The fault bit D2 is set in 0x1A34 and
+    # must not change the temperature.
+    import sys
+    kernels = [("numpy", _convert_numpy)]
+    if numba is not None:
+        kernels.append(("numba", _convert))
+    else:
+        print("numba not installed, skipping numba kernel")
+    frames = np.array([0x1A30, 0x1A34, 0x0000], dtype=np.uint16)
+    expected = {"c": [209.5, 209.5, 0.0], "k": [482.65, 482.65, 273.15], "f": [409.1, 409.1, 32.0]}
+    failed = False
+    for name, kernel in kernels:
+        for units, temps in sorted(expected.items()):
+            scale, offset = UNIT_CONVERSION[units]
+            got = kernel(frames, scale, offset)
+            ok = all(abs(g - t) < 0.01 for g, t in zip(got, temps))
+            failed |= not ok
+            print("{} {}: {} {}".format(name, units, [round(g, 2) for g in got.tolist()], "ok" if ok else "FAILED, expected %s" % temps))
+    ok = abs(frames_to_temperatures([0x1A30], "f")[0] - 409.1) < 0.01
+    failed |= not ok
+    print("frames_to_temperatures: {}".format("ok" if ok else "FAILED"))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,10 @@
+#!/usr/bin/python
+'''MAX6675 unit conversion table, shared by max6675 and max6675_bulk.
+Has no imports, so it loads without RPi.GPIO or numpy.'''
+
+# (scale, offset) that turn the 12 bit thermocouple reading into each unit
+UNIT_CONVERSION = {
+    "c": (0.25, 0.0),
+    "k": (0.25, 273.15),
+    "f": (0.45, 32.0),
+}
@@ -143,12 +143,17 @@ class TempSensorReal(TempSensor):
 
         if config.max6675:
             log.info("init MAX6675")
+            if config.spi_sensor_bus is None:
+                log.warning("MAX6675 bitbang SPI is deprecated, see docs/max6675_spi.md")
             from max6675 import MAX6675, MAX6675Error
             self.thermocouple = MAX6675(config.gpio_sensor_cs,
                                      config.gpio_sensor_clock,
                                      config.gpio_sensor_data,
                                      config.temp_scale,
-                                     config.gpio_sensor_power)
+                                     config.gpio_sensor_power,
+                                     spi_bus = config.spi_sensor_bus,
+                                     spi_device = config.spi_sensor_device,
+                                     sysfs = config.gpio_sensor_sysfs)
 
 
         if config.max31856: